@@ -1,80 +1,298 @@
+import atexit
+import base64
+import json
+import logging
 import os
+import queue
+import signal
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+import certifi
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 import RPi.GPIO as GPIO
 
+try:
+    from orjson import dumps as json_dumps, loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+    def json_dumps(obj):
+        return json.dumps(obj).encode()
+
 from pn532 import PN532_SPI as PN532
 from ntag import NTAG
 
-def authenticate_user():
-    username = os.getenv('USERNAME')
-    password = os.getenv('PASSWORD')
-    auth_url = os.getenv('AUTH_URL')
+@dataclass(frozen=True)
+class Config:
+    username: str
+    password: str
+    auth_url: str
+    api_url: str
+    refresh_url: Optional[str] = None
+    pn532_irq: Optional[int] = None
+
+def load_config():
+    required = ('USERNAME', 'PASSWORD', 'AUTH_URL', 'API_URL')
+    missing = [name for name in required if not os.getenv(name)]
+    if missing:
+        sys.exit(f"Missing environment variables: {', '.join(missing)}, exiting program.")
+    irq = os.getenv('PN532_IRQ')
     try:
-        response = requests.post(auth_url, data={'username': username, 'password': password})
+        irq = int(irq) if irq else None
+    except ValueError:
+        sys.exit(f"PN532_IRQ must be a BCM GPIO pin number, got {irq!r}, exiting program.")
+    return Config(username=os.environ['USERNAME'],
+                  password=os.environ['PASSWORD'],
+                  auth_url=os.environ['AUTH_URL'],
+                  api_url=os.environ['API_URL'],
+                  refresh_url=os.getenv('REFRESH_URL'),
+                  pn532_irq=irq)
+
+CONFIG = load_config()
+
+TOKEN_CACHE_PATH = os.path.expanduser('~/.cache/edge_jwt.json')
+TOKEN_EXPIRY_MARGIN = 60
+REQUEST_TIMEOUT = (3, 10)
+JSON_HEADERS = {'Content-Type': 'application/json'}
+POLL_TIMEOUT = 0.05
+IDLE_BACKOFF_MAX = 0.25
+
+def setup_logging():
+    log_formatter = logging.Formatter('%(asctime)s %(levelname)s %(message)s')
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(log_formatter)
+    # Callers only enqueue records; formatting and writing happen on the listener thread.
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    logger = logging.getLogger()
+    logger.setLevel(logging.INFO)
+    logger.addHandler(QueueHandler(log_queue))
+    # PN532 driver and block-level tag read/write diagnostics.
+    logging.getLogger('pn532').setLevel(logging.DEBUG)
+    logging.getLogger('ntag').setLevel(logging.DEBUG)
+
+def create_session():
+    session = requests.Session()
+    session.verify = certifi.where()
+    # Every call here is a POST, which is not safe to resend once the server
+    # may have seen it, so only connection failures are retried.
+    retry = Retry(total=4, backoff_factor=0.3)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=retry)
+    session.mount('https://', adapter)
+    return session
+
+class AuthenticationError(Exception):
+    """
+    Raised when no access token could be obtained from the auth API.
+    """
+    pass
+
+def token_expiry(token):
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload)).get('exp', 0)
+    except (AttributeError, IndexError, ValueError):
+        return 0
+
+def load_cached_tokens():
+    try:
+        with open(TOKEN_CACHE_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_cached_tokens(access, refresh=None):
+    cached = {'access': access, 'refresh': refresh, 'exp': token_expiry(access)}
+    try:
+        os.makedirs(os.path.dirname(TOKEN_CACHE_PATH), exist_ok=True)
+        fd = os.open(TOKEN_CACHE_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(cached, f)
+    except OSError as e:
+        logging.warning('Could not cache access token: %s', e)
+
+def refresh_access_token(session, refresh):
+    if not refresh or not CONFIG.refresh_url:
+        return None
+    try:
+        response = session.post(CONFIG.refresh_url, data={'refresh': refresh},
+                                timeout=REQUEST_TIMEOUT)
+        if response.status_code == 200:
+            return json_loads(response.content).get('access')
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logging.warning('Error refreshing access token: %s', e)
+    return None
+
+def authenticate_user(session, use_cached=True):
+    cached = load_cached_tokens()
+    if use_cached and cached.get('access') and cached.get('exp', 0) - TOKEN_EXPIRY_MARGIN > time.time():
+        return cached['access']
+    access = refresh_access_token(session, cached.get('refresh'))
+    if access:
+        save_cached_tokens(access, cached.get('refresh'))
+        return access
+
+    try:
+        response = session.post(CONFIG.auth_url, data={'username': CONFIG.username, 'password': CONFIG.password},
+                                timeout=REQUEST_TIMEOUT)
         if response.status_code == 200:
-            return response.json().get('access')
+            tokens = json_loads(response.content)
+            save_cached_tokens(tokens.get('access'), tokens.get('refresh'))
+            return tokens.get('access')
         else:
-            sys.exit("Authentication failed, exiting program.")
-    except requests.exceptions.RequestException as e:
-        sys.exit(f"Error during authentication request, exiting program. Error was: {e}")
-
-def clean_ntag_url(url):
-    if url.startswith('http://'):
-        return url[7:]
-    if url.startswith('https://'):
-        return url[8:]
-    return url
-
-def register_ntag(token, uid):
-    api_url = os.getenv('API_URL')
-    headers = {'Authorization': f'Bearer {token}'}
+            raise AuthenticationError(f"Authentication failed with status code {response.status_code}.")
+    except (requests.exceptions.RequestException, ValueError) as e:
+        raise AuthenticationError(f"Error during authentication request: {e}") from e
+
+class TokenCache:
+    """
+    Holds the current access token and keeps the session's Authorization
+    header in sync, re-authenticating only when it is about to expire or
+    the API has rejected it.
+    """
+    __slots__ = ('session', 'token', 'exp', '_stale', '_lock')
+
+    def __init__(self, session):
+        self.session = session
+        self.token = None
+        self.exp = 0
+        self._stale = False
+        self._lock = threading.Lock()
+
+    def get_token(self):
+        with self._lock:
+            if self.token is None or self._stale or time.time() > self.exp - TOKEN_EXPIRY_MARGIN:
+                self.token = authenticate_user(self.session, use_cached=not self._stale)
+                # Tokens without an exp claim are kept until the API rejects them.
+                self.exp = token_expiry(self.token) or float('inf')
+                self._stale = False
+                self.session.headers['Authorization'] = f'Bearer {self.token}'
+            return self.token
+
+    def invalidate(self, token):
+        with self._lock:
+            # Several workers may see the same 401; only the first forces re-auth.
+            if token == self.token:
+                self._stale = True
+
+def register_ntag(session, tokens, uid, retry_unauthorized=True):
     payload = {'serial_number': uid}
-    
+
     try:
-        response = requests.post(api_url, headers=headers, json=payload, verify=True)
+        token = tokens.get_token()
+        response = session.post(CONFIG.api_url, data=json_dumps(payload), headers=JSON_HEADERS,
+                                timeout=REQUEST_TIMEOUT)
+        if response.status_code == 401 and retry_unauthorized:
+            tokens.invalidate(token)
+            return register_ntag(session, tokens, uid, retry_unauthorized=False)
         if response.status_code == 201 or response.status_code == 200:
-            ntag_url = response.json().get('nfc_tag_url')
-            clean_url = clean_ntag_url(ntag_url)
-            print(f"NTAG: {uid} registered successfully.")
-            print(f"Clean NTAG URL: {clean_url}")
-            return clean_url
+            ntag_url = json_loads(response.content).get('nfc_tag_url')
+            logging.info('NTAG: %s registered successfully.', uid)
+            logging.info('NTAG URL: %s', ntag_url)
+            return ntag_url
         else:
-            print(f"Failed to register or update NTAG. Status code: {response.status_code}, Error: {response.text}")
+            logging.error('Failed to register or update NTAG. Status code: %s, Error: %s',
+                          response.status_code, response.text)
             return None
-    except requests.exceptions.RequestException as e:
-        print(f"Error communicating with NTAG API: {e}")
+    except AuthenticationError as e:
+        logging.error('Could not register NTAG %s: %s', uid, e)
+        return None
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logging.error('Error communicating with NTAG API: %s', e)
         return None
 
+def setup_card_irq():
+    GPIO.setup(CONFIG.pn532_irq, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+
+def wait_for_card(pn532):
+    while not pn532.start_passive_target_detection():
+        time.sleep(IDLE_BACKOFF_MAX)
+    # Block in the kernel until IRQ falls. Checking the level before and after
+    # covers a card found outside the wait; no card within a second is
+    # reported like an empty poll, so main() sees the field go empty.
+    if (GPIO.input(CONFIG.pn532_irq)
+            and GPIO.wait_for_edge(CONFIG.pn532_irq, GPIO.FALLING, timeout=1000) is None
+            and GPIO.input(CONFIG.pn532_irq)):
+        return None
+    return pn532.read_passive_target(timeout=POLL_TIMEOUT)
+
 def main():
+    setup_logging()
+    atexit.register(GPIO.cleanup)
+    # Let systemd's SIGTERM unwind through atexit like Ctrl-C does.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    pn532 = PN532(reset=20, cs=4, irq=CONFIG.pn532_irq)
+    pn532.SAM_configuration()
+    ntag = NTAG(pn532)
+    if CONFIG.pn532_irq is not None:
+        setup_card_irq()
+
+    session = create_session()
+    tokens = TokenCache(session)
     try:
-        pn532 = PN532(debug=True, reset=20, cs=4)
-        pn532.SAM_configuration()
-        ntag = NTAG(pn532, debug=True)
-
-        token = authenticate_user()
-        uid_list = []
-        last_uid = None
-        print('Waiting for an NFC card...')
+        tokens.get_token()
+    except AuthenticationError as e:
+        sys.exit(f"{e} Exiting program.")
+    seen_uids = set()
+    pending = {}
+    last_uid = None
+    idle = 0.0
+    logging.info('Waiting for an NFC card...')
+    with ThreadPoolExecutor(max_workers=4) as executor:
         while True:
-            serial_number = pn532.list_passive_target(timeout=0.5)
-            if serial_number and serial_number != last_uid:
-                last_uid = serial_number
-                uid = ':'.join(['{:02X}'.format(i) for i in serial_number])
-                if uid not in uid_list:
-                    uid_list.append(uid)
-                    print(f'Found new card. Extracted UID: {uid}')
-                    ntag_url = register_ntag(token, uid)
-                    if ntag_url:
-                        record = ntag.create_ndef_record(tnf=0x01, record_type='U', payload=ntag_url)
-                        ntag.write_ndef_message(record)
+            if CONFIG.pn532_irq is not None:
+                serial_number = wait_for_card(pn532)
+            else:
+                serial_number = pn532.list_passive_target(timeout=POLL_TIMEOUT)
+            if not serial_number:
+                # The card has left the field, so the next read of it is a new tap.
+                last_uid = None
+                # Back off while the field is empty, reset as soon as a card shows up.
+                time.sleep(idle)
+                idle = min(idle * 2 + 0.01, IDLE_BACKOFF_MAX)
+                continue
+            idle = 0.0
+            # Registration runs in the executor so the reader keeps polling;
+            # the URL is written once the card is seen again after it completes.
+            registration = pending.get(serial_number)
+            if registration is not None and registration.done():
+                ntag_url = registration.result()
+                if ntag_url:
+                    # A card pulled away mid-write leaves a truncated TLV; keep the
+                    # completed registration pending so the write is retried the
+                    # next time the card is detected.
+                    if ntag.write_url(ntag_url):
+                        del pending[serial_number]
+                    else:
+                        logging.warning('Writing URL to NTAG %s failed, will retry.',
+                                        serial_number.hex(':').upper())
                 else:
-                    print(f'Found duplicate card. Extracted UID: {uid}')
-    except Exception as e:
-        print(e)
-    finally:
-        GPIO.cleanup()
+                    del pending[serial_number]
+                    # Registration failed and was logged; retry on the next tap,
+                    # i.e. once the card has left the field and returns.
+                    seen_uids.discard(serial_number)
+            if serial_number == last_uid:
+                continue
+            last_uid = serial_number
+            uid = serial_number.hex(':').upper()
+            if serial_number not in seen_uids:
+                seen_uids.add(serial_number)
+                logging.info('Found new card. Extracted UID: %s', uid)
+                pending[serial_number] = executor.submit(register_ntag, session, tokens, uid)
+            else:
+                logging.info('Found duplicate card. Extracted UID: %s', uid)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
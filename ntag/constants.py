@@ -10,6 +10,15 @@ _NTAG_CMD_PWD_AUTH = 0x1B
 _NTAG_CMD_READ_SIG = 0x3C
 _NTAG_ADDR_READ_SIG = 0x00
 
+# NTAG213 memory: 45 pages, of which 4-39 are user memory; the pages after
+# it hold lock bytes, CFG and PWD
+_NTAG213_PAGES = 45
+_NTAG213_FIRST_USER_PAGE = 4
+_NTAG213_LAST_USER_PAGE = 39
+
+# Blocks per FAST_READ, kept well inside a single PN532 InDataExchange frame
+_FAST_READ_MAX_BLOCKS = 16
+
 # NDEF Record Types
 _NDEF_URIPREFIX_NONE = 0x00
 _NDEF_URIPREFIX_HTTP_WWWDOT = 0x01
@@ -48,6 +57,46 @@ _NDEF_URIPREFIX_URN_EPC_RAW = 0x21
 _NDEF_URIPREFIX_URN_EPC = 0x22
 _NDEF_URIPREFIX_URN_NFC = 0x23
 
+# URI identifier codes by the prefix they abbreviate (NFC Forum URI RTD)
+URI_PREFIX_MAP = {
+    '': _NDEF_URIPREFIX_NONE,
+    'http://www.': _NDEF_URIPREFIX_HTTP_WWWDOT,
+    'https://www.': _NDEF_URIPREFIX_HTTPS_WWWDOT,
+    'http://': _NDEF_URIPREFIX_HTTP,
+    'https://': _NDEF_URIPREFIX_HTTPS,
+    'tel:': _NDEF_URIPREFIX_TEL,
+    'mailto:': _NDEF_URIPREFIX_MAILTO,
+    'ftp://anonymous:anonymous@': _NDEF_URIPREFIX_FTP_ANONAT,
+    'ftp://ftp.': _NDEF_URIPREFIX_FTP_FTPDOT,
+    'ftps://': _NDEF_URIPREFIX_FTPS,
+    'sftp://': _NDEF_URIPREFIX_SFTP,
+    'smb://': _NDEF_URIPREFIX_SMB,
+    'nfs://': _NDEF_URIPREFIX_NFS,
+    'ftp://': _NDEF_URIPREFIX_FTP,
+    'dav://': _NDEF_URIPREFIX_DAV,
+    'news:': _NDEF_URIPREFIX_NEWS,
+    'telnet://': _NDEF_URIPREFIX_TELNET,
+    'imap:': _NDEF_URIPREFIX_IMAP,
+    'rtsp://': _NDEF_URIPREFIX_RTSP,
+    'urn:': _NDEF_URIPREFIX_URN,
+    'pop:': _NDEF_URIPREFIX_POP,
+    'sip:': _NDEF_URIPREFIX_SIP,
+    'sips:': _NDEF_URIPREFIX_SIPS,
+    'tftp:': _NDEF_URIPREFIX_TFTP,
+    'btspp://': _NDEF_URIPREFIX_BTSPP,
+    'btl2cap://': _NDEF_URIPREFIX_BTL2CAP,
+    'btgoep://': _NDEF_URIPREFIX_BTGOEP,
+    'tcpobex://': _NDEF_URIPREFIX_TCPOBEX,
+    'irdaobex://': _NDEF_URIPREFIX_IRDAOBEX,
+    'file://': _NDEF_URIPREFIX_FILE,
+    'urn:epc:id:': _NDEF_URIPREFIX_URN_EPC_ID,
+    'urn:epc:tag:': _NDEF_URIPREFIX_URN_EPC_TAG,
+    'urn:epc:pat:': _NDEF_URIPREFIX_URN_EPC_PAT,
+    'urn:epc:raw:': _NDEF_URIPREFIX_URN_EPC_RAW,
+    'urn:epc:': _NDEF_URIPREFIX_URN_EPC,
+    'urn:nfc:': _NDEF_URIPREFIX_URN_NFC,
+}
+
 _CONFIG_PAGE_START = 0x29
 _CONFIG_PAGE_END = 0x2C
 
@@ -1,12 +1,36 @@
-from .constants import (_NTAG_CMD_READ, _NTAG_CMD_WRITE)
+import logging
+import struct
+
+from .constants import (_NTAG_CMD_READ, _NTAG_CMD_FAST_READ, _NTAG_CMD_WRITE,
+                        _FAST_READ_MAX_BLOCKS, _NTAG213_PAGES, _NTAG213_FIRST_USER_PAGE,
+                        _NTAG213_LAST_USER_PAGE, URI_PREFIX_MAP)
+
+logger = logging.getLogger(__name__)
+
+# Encoded URI prefixes bucketed by first byte, longest first within a bucket,
+# so an encoded URL is only compared against prefixes that can match and the
+# first match is the best one.
+_URI_PREFIX_BUCKETS = {
+    first.encode('ascii'): tuple(sorted(
+        ((prefix.encode('ascii'), code) for prefix, code in URI_PREFIX_MAP.items()
+         if prefix[:1] == first),
+        key=lambda item: -len(item[0])))
+    for first in {prefix[:1] for prefix in URI_PREFIX_MAP if prefix}
+}
 
 
 class NTAG:
     def __init__(self, pn532, debug=False):
-        # Initialize memory: 45 pages, 4 bytes per page
+        # `debug` is accepted for compatibility and ignored; block-level
+        # diagnostics are logged to the 'ntag' logger at DEBUG level.
+        # Initialize memory: NTAG213 pages, 4 bytes per page
         self.pn532 = pn532
-        self.debug = debug
-        self.memory = [[0x00 for _ in range(4)] for _ in range(45)]
+        # Flat buffer, page n is memory[4 * n:4 * n + 4].
+        self.memory = bytearray(_NTAG213_PAGES * 4)
+        # Reused InDataExchange parameters: target number, command, address, data.
+        self._params = bytearray(7)
+        self._params[0] = 0x01
+        self._params_view = memoryview(self._params)
         self._initialize_memory()
 
     def _initialize_memory(self):
@@ -16,109 +40,228 @@ class NTAG:
         Block 4: NDEF Magic Number
         Block 5: Pre-programmed data
         """
-        self.memory[3] = [0xE1, 0x10, 0x12, 0x00]
-        self.memory[4] = [0x01, 0x03, 0xA0, 0x0C]
-        self.memory[5] = [0x34, 0x03, 0x00, 0xFE]
+        self.memory[12:24] = (0xE1, 0x10, 0x12, 0x00,
+                              0x01, 0x03, 0xA0, 0x0C,
+                              0x34, 0x03, 0x00, 0xFE)
 
     def write_block(self, block_number, data):
         """
         Write a block of data to the card.
         """
-        if not (0 <= block_number < 45):
+        if not (0 <= block_number < _NTAG213_PAGES):
             raise ValueError("Block number out of range")
         if not data or not 1 < len(data) <= 4:
             raise ValueError('Data must be an array of 1 to 4 bytes.')
 
-        params = bytearray(3 + len(data))
-        params[0] = 0x01
-        params[1] = _NTAG_CMD_WRITE
-        params[2] = block_number & 0xFF
-        params[3:] = data
-        response = self.pn532._call_function(params=params, response_length=1)
+        length = 3 + len(data)
+        self._params[1] = _NTAG_CMD_WRITE
+        self._params[2] = block_number & 0xFF
+        self._params[3:length] = data
+        response = self.pn532._call_function(params=self._params_view[:length],
+                                             response_length=1)
+        if response is None:
+            logger.error('Communication error while writing block %s.', block_number)
+            return False
         if response[0]:
-            print('Error writing block {}: {}'.format(block_number, response[0]))
+            logger.error('Error writing block %s: %s', block_number, response[0])
         return response[0] == 0x00
 
+    def write_blocks(self, start_block, data):
+        """
+        Write data to consecutive blocks starting at start_block.
+        NTAG21x has no multi-block write, so this is one WRITE per block,
+        stopping at the first block that fails. Only user memory can be
+        written this way, so an oversized message cannot reach the lock
+        and configuration pages.
+
+        :param data: Bytes-like object, a whole number of 4-byte blocks
+        :return: True if every block was written, False otherwise
+        """
+        if len(data) % 4:
+            raise ValueError('Data must be a whole number of 4-byte blocks.')
+        if not (_NTAG213_FIRST_USER_PAGE <= start_block and
+                start_block + len(data) // 4 - 1 <= _NTAG213_LAST_USER_PAGE):
+            raise ValueError('Data does not fit in user memory.')
+
+        data = memoryview(data)
+        for i in range(0, len(data), 4):
+            block_number = start_block + i // 4
+            block_data = data[i:i + 4]
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug('Writing data to block %s: %s', block_number, block_data.hex(' '))
+            if not self.write_block(block_number, block_data):
+                return False
+        return True
+
     def read_block(self, block_number):
         """
         Read a block of data from the card.
         """
-        if not (0 <= block_number < 45):
+        pages = self.read_pages(block_number)
+        if pages is None:
+            return None
+        return pages[:4]
+
+    def read_pages(self, block_number):
+        """
+        Read four consecutive blocks starting at block_number in one command.
+        The NTAG READ command always returns 16 bytes, rolling over to block 0
+        past the end of memory.
+        """
+        if not (0 <= block_number < _NTAG213_PAGES):
             raise ValueError("Block number out of range")
 
-        params = [0x01, _NTAG_CMD_READ, block_number & 0xFF] 
-        response = self.pn532._call_function(params=params,
+        self._params[1] = _NTAG_CMD_READ
+        self._params[2] = block_number & 0xFF
+        response = self.pn532._call_function(params=self._params_view[:3],
                                              response_length=17)
         if response is None:
-            print(f'Communication error while reading block {block_number}.')
+            logger.error('Communication error while reading block %s.', block_number)
             return None
         elif response[0] != 0x00:
-            print(f'Error reading block {block_number}: {response[0]}')
+            logger.error('Error reading block %s: %s', block_number, response[0])
             return None
-        return response[1:][:4]
+        return response[1:17]
 
-    def dump(self, start_block=0, end_block=44):
+    def read_blocks(self, start_block, end_block):
+        """
+        Read blocks start_block to end_block (inclusive) in a single FAST_READ
+        command. At most _FAST_READ_MAX_BLOCKS blocks can be read at once.
+        """
+        if not (0 <= start_block <= end_block < _NTAG213_PAGES):
+            raise ValueError("Block number out of range")
+        if end_block - start_block + 1 > _FAST_READ_MAX_BLOCKS:
+            raise ValueError(f'At most {_FAST_READ_MAX_BLOCKS} blocks can be read at once.')
+
+        length = (end_block - start_block + 1) * 4
+        self._params[1] = _NTAG_CMD_FAST_READ
+        self._params[2] = start_block & 0xFF
+        self._params[3] = end_block & 0xFF
+        response = self.pn532._call_function(params=self._params_view[:4],
+                                             response_length=length + 1)
+        if response is None:
+            logger.error('Communication error while reading blocks %s-%s.', start_block, end_block)
+            return None
+        elif response[0] != 0x00:
+            logger.error('Error reading blocks %s-%s: %s', start_block, end_block, response[0])
+            return None
+        return response[1:length + 1]
+
+    def dump(self, start_block=0, end_block=_NTAG213_PAGES - 1):
         """
         Reads specified range of pages (blocks) of the NTAG2xx NFC tag.
         """
-        print(f"Reading NTAG213 NFC tag from block {start_block} to block {end_block}...")
+        logger.info('Reading NTAG213 NFC tag from block %s to block %s...', start_block, end_block)
 
         all_data = []
-        for block_number in range(start_block, end_block + 1):
-            block_data = self.read_block(block_number)
-            if block_data is None:
-                print(f"Error or no response while reading block {block_number}.")
+        for first_block in range(start_block, end_block + 1, _FAST_READ_MAX_BLOCKS):
+            last_block = min(first_block + _FAST_READ_MAX_BLOCKS - 1, end_block)
+            data = self.read_blocks(first_block, last_block)
+            if data is None:
+                logger.error('Error or no response while reading block %s.', first_block)
                 break
 
-            formatted_block_data = ' '.join(['%02X' % x for x in block_data])
-            all_data.append(formatted_block_data)
+            for block_number in range(first_block, last_block + 1):
+                offset = (block_number - first_block) * 4
+                block_data = data[offset:offset + 4]
+                formatted_block_data = bytes(block_data).hex(' ').upper()
+                all_data.append(formatted_block_data)
 
-            if self.debug:
-                print(f"Block {block_number}: {formatted_block_data}")
+                logger.debug('Block %s: %s', block_number, formatted_block_data)
 
         return all_data
 
-    def _create_message_flags(self, payload, id, tnf):
-        # Assuming 'only' position if there's a single record
-        MB = 0x80  # Message Begin
-        ME = 0x40  # Message End
-        CF = 0x00  # Chunk Flag, not used for a single record
-        SR = 0x10 if len(payload) < 256 else 0x00  # Short Record
-        IL = 0x08 if id else 0x00  # ID Length
-        return MB | ME | CF | SR | IL | tnf
+    def _create_message_flags(self, payload_length, has_id, tnf):
+        # Assuming 'only' position if there's a single record:
+        # MB (0x80) | ME (0x40), CF (0x00) is not used for a single record.
+        SR = 0x10 * (payload_length < 256)  # Short Record, from the encoded length
+        IL = 0x08 * bool(has_id)  # ID Length
+        return 0xC0 | SR | IL | tnf
 
     def _prepare_payload(self, record_type, payload):
+        payload_bytes = payload.encode()
         if record_type == 'U':
-            # Choose the URI identifier code based on the debug flag
-            uri_identifier_code = b'\x04' # b'\x03' if self.debug else b'\x04'
-            return uri_identifier_code + payload.encode()
-        return payload.encode()
+            for prefix, code in _URI_PREFIX_BUCKETS.get(payload_bytes[:1], ()):
+                if payload_bytes.startswith(prefix):
+                    return bytes([code]) + payload_bytes[len(prefix):]
+            return bytes([URI_PREFIX_MAP['']]) + payload_bytes
+        return payload_bytes
 
     def _create_record_header(self, message_flags, record_type, payload, id):
-        type_length = len(record_type).to_bytes(1, byteorder='big')
-        payload_length = len(payload).to_bytes(1 if len(payload) < 256 else 4, byteorder='big')
-        id_length = len(id).to_bytes(1, byteorder='big') if id else b''
         record_type_bytes = record_type.encode()
-        id_bytes = id.encode()
-        return bytes([message_flags]) + type_length + payload_length + id_length + record_type_bytes + id_bytes
+        id_bytes = id.encode() if id else b''
+        payload_length = len(payload)
+        short_record = payload_length < 256
+        # Flags, type length, payload length (1 or 4 bytes), optional ID length,
+        # type and ID, written into a single buffer.
+        offset = 3 if short_record else 6
+        header = bytearray(offset + (1 if id else 0) + len(record_type_bytes) + len(id_bytes))
+        header[0] = message_flags
+        header[1] = len(record_type_bytes)
+        struct.pack_into('>B' if short_record else '>I', header, 2, payload_length)
+        if id:
+            header[offset] = len(id_bytes)
+            offset += 1
+        header[offset:offset + len(record_type_bytes)] = record_type_bytes
+        header[offset + len(record_type_bytes):] = id_bytes
+        return header
 
     def _construct_complete_record(self, header, payload):
-        complete_record = header + payload
-        tlv_type = b'\x03'
-        ndef_length = len(complete_record)
-        tlv_length = bytes([ndef_length]) if ndef_length < 255 else b'\xFF' + ndef_length.to_bytes(2, byteorder='big')
-        tlv = b'\x34' + tlv_type + tlv_length + complete_record + b'\xFE'  # Append terminator
+        ndef_length = len(header) + len(payload)
+        offset = 3 if ndef_length < 255 else 5
+        # Lock control TLV tail, NDEF TLV tag and length, record, terminator;
+        # padded up to a whole number of blocks so it can be written as is.
+        tlv = bytearray((offset + ndef_length + 1 + 3) & ~3)
+        tlv[0] = 0x34
+        tlv[1] = 0x03
+        if offset == 3:
+            tlv[2] = ndef_length
+        else:
+            struct.pack_into('>BH', tlv, 2, 0xFF, ndef_length)
+        tlv[offset:offset + len(header)] = header
+        offset += len(header)
+        tlv[offset:offset + len(payload)] = payload
+        tlv[offset + len(payload)] = 0xFE
         return tlv
 
     def create_ndef_record(self, tnf=0x01, record_type='T', payload='', id=''):
         """
-        Method to create the NDEF record with debug statements.
+        Build a single NDEF record wrapped in its TLV, padded to whole blocks.
         """
-        message_flags = self._create_message_flags(payload, id, tnf)
         prepared_payload = self._prepare_payload(record_type, payload)
+        message_flags = self._create_message_flags(len(prepared_payload), id, tnf)
         header = self._create_record_header(message_flags, record_type, prepared_payload, id)
         return self._construct_complete_record(header, prepared_payload)
     
+    def write_url(self, url, start_block=5):
+        """
+        Write a URL to the tag as a single short NDEF URI record.
+
+        The TLV is laid out in one padded buffer instead of being assembled
+        by create_ndef_record and re-chunked by write_ndef_message.
+
+        :param url: URL to write; a known scheme is abbreviated to its URI identifier code
+        :param start_block: Starting block number to write the message
+        :return: True if write is successful, False if it fails or the URL does not fit
+        """
+        payload = self._prepare_payload('U', url)
+        length = len(payload)
+        # Lock control TLV tail, NDEF TLV tag and length, short record header,
+        # payload, terminator; padded up to a whole number of blocks.
+        size = (8 + length + 3) & ~3
+        capacity = (_NTAG213_LAST_USER_PAGE - start_block + 1) * 4
+        # The one-byte TLV length covers the 4-byte record header plus payload
+        # and must stay below 0xFF, which user memory bounds well before that.
+        if size > capacity or 4 + length >= 0xFF:
+            logger.error('URL does not fit in user memory from block %s: %s bytes needed, %s available.',
+                         start_block, size, capacity)
+            return False
+
+        message = bytearray(size)
+        struct.pack_into(f'7B{length}sB', message, 0,
+                         0x34, 0x03, 4 + length, 0xD1, 0x01, length, ord('U'), payload, 0xFE)
+        return self.write_ndef_message(message, start_block)
+
     def write_ndef_message(self, ndef_message, start_block=5):
         """
         Write an NDEF message to an NTAG2XX NFC tag.
@@ -128,20 +271,15 @@ class NTAG:
         :return: True if write is successful, False otherwise
         """
         try:
-            for i in range(0, len(ndef_message), 4):
-                block_data = ndef_message[i:i + 4]
-                if len(block_data) < 4:
-                    block_data += b'\x00' * (4 - len(block_data))
-
-                if self.debug:
-                    print(f"Writing data to block {start_block + i // 4}: {block_data}")
-
-                self.write_block(start_block + i // 4, block_data)
+            if len(ndef_message) % 4:
+                ndef_message = bytes(ndef_message) + bytes(4 - len(ndef_message) % 4)
+            if not self.write_blocks(start_block, ndef_message):
+                logger.error('Error writing NDEF message to the tag.')
+                return False
 
-            if self.debug:
-                print("Successfully wrote NDEF message to the NFC tag.")
+            logger.debug('Successfully wrote NDEF message to the NFC tag.')
 
             return True
         except Exception as e:
-            print("Error writing NDEF message to the tag:", e)
+            logger.error('Error writing NDEF message to the tag: %s', e)
             return False
\ No newline at end of file
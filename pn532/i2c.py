@@ -29,11 +29,14 @@ This module will let you communicate with a PN532 RFID/NFC chip
 using I2C on the Raspberry Pi.
 """
 import fcntl
+import logging
 import os
 import time
 import RPi.GPIO as GPIO
 from .pn532 import PN532, BusyError
 
+logger = logging.getLogger(__name__)
+
 I2C_ADDRESS = 0x24
 I2C_CHANNEL = 1
 I2C_SLAVE = 1795
@@ -71,10 +74,9 @@ class PN532_I2C(PN532):
     def __init__(self, irq=None, reset=None, req=None, debug=False):
         """
         Create an instance of the PN532 class using I2C. Note that PN532
-        uses clock stretching. Optional IRQ pin (not used),
-        reset pin and debugging output.
+        uses clock stretching. Optional IRQ pin (used to wait for responses)
+        and reset pin; `debug` is ignored, see the 'pn532' logger.
         """
-        self.debug = debug
         self._irq = irq
         self._req = req
         GPIO.setmode(GPIO.BCM)
@@ -124,7 +126,16 @@ class PN532_I2C(PN532):
         """
         Poll PN532 if status byte is ready, up to `timeout` seconds
         """
-        time.sleep(0.01)
+        if self._irq:
+            # The PN532 holds IRQ low while a frame is waiting, so block on
+            # the falling edge instead of polling the status byte over I2C.
+            if not GPIO.input(self._irq):
+                return True
+            # Re-check the level on timeout: IRQ may have fallen between the
+            # check above and arming the edge wait, and that edge is lost.
+            return (GPIO.wait_for_edge(self._irq, GPIO.FALLING,
+                                       timeout=max(1, int(timeout * 1000))) is not None
+                    or not GPIO.input(self._irq))
         status = bytearray(1)
         timestamp = time.monotonic()
         while (time.monotonic() - timestamp) < timeout:
@@ -143,19 +154,17 @@ class PN532_I2C(PN532):
         Read a specified count of bytes from the PN532.
         """
         try:
-            status = self._i2c.read(1)[0]
-            if status != 0x01:
+            # Every I2C read starts with the status byte, so fetch it together
+            # with the frame in a single transaction.
+            frame = self._i2c.read(count+1)
+            if not frame or frame[0] != 0x01:
                 raise BusyError
-            frame = bytes(self._i2c.read(count+1))
         except OSError as err:
-            if self.debug:
-                print(err)
+            logger.debug('I2C read failed: %s', err)
             return
 
-        if self.debug:
-            print("Reading: ", [hex(i) for i in frame[1:]])
-        else:
-            time.sleep(0.1)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('Reading: %s', frame[1:].hex(' '))
         return frame[1:]
 
     def _write_data(self, framebytes):
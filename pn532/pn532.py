@@ -28,6 +28,8 @@
 This module will let you communicate with a PN532 NFC Hat using I2C, SPI or UART.
 The main difference is the interfaces implements.
 """
+import logging
+import struct
 import RPi.GPIO as GPIO
 from .constants import (PN532_ERRORS,
                         _HOSTTOPN532,
@@ -42,6 +44,13 @@ from .constants import (PN532_ERRORS,
                         _PN532_CMD_INLISTPASSIVETARGET,
                         _PN532_CMD_INDATAEXCHANGE)
 
+logger = logging.getLogger(__name__)
+
+# Every frame starts with the same three bytes, so their checksum contribution is fixed.
+_FRAME_START = bytes((_PREAMBLE, _STARTCODE1, _STARTCODE2))
+_FRAME_START_CHECKSUM = sum(_FRAME_START)
+_ACK_LEN = len(_ACK)
+
 
 class PN532Error(Exception):
     """
@@ -66,8 +75,10 @@ class PN532:
     def __init__(self, *, debug=False, reset=None):
         """
         Create an instance of the PN532 class
+
+        `debug` is accepted for compatibility and ignored; driver diagnostics
+        are logged to the 'pn532' logger at DEBUG level.
         """
-        self.debug = debug
         if reset:
             self._reset(reset)
         self._initialize()
@@ -82,20 +93,34 @@ class PN532:
         """
         Send specified command to the PN532
         """
+        if not self._send_command(command, params, timeout):
+            return None
+        return self._read_response(response_length, timeout)
+
+    def _send_command(self, command, params=None, timeout=1):
+        """
+        Send a command frame to the PN532 and wait for its ACK.
+        """
         if params is None:
             params = []
         packet_data = bytearray(2 + len(params))
         packet_data[0] = _HOSTTOPN532
         packet_data[1] = command & 0xFF
-        for i, val in enumerate(params):
-            packet_data[2+i] = val
+        # Accepts a list of ints or any bytes-like object, e.g. a memoryview slice.
+        packet_data[2:] = params
         try:
             self._write_frame(packet_data)
         except OSError:
             self._wakeup()
-            return None
-        if not self._wait_for_ack():
-            return None
+            return False
+        if not self._wait_ready(timeout):
+            return False
+        return self._wait_for_ack()
+
+    def _read_response(self, response_length, timeout=1):
+        """
+        Wait for and read the response to the last acknowledged command.
+        """
         if not self._wait_ready(timeout):
             return None
         response = self._read_frame(response_length + 2)
@@ -111,8 +136,7 @@ class PN532:
         if response is None:
             raise RuntimeError('Failed to detect the PN532')
         ic, ver, rev, support = tuple(response)
-        if self.debug:
-            print(f'Found PN532 with firmware version: {ver}.{rev}')
+        logger.debug('Found PN532 with firmware version: %s.%s', ver, rev)
         return
 
     def _initialize(self):
@@ -164,18 +188,13 @@ class PN532:
         """
         packet_length = len(packet_data)
         frame = bytearray(packet_length + 7)
-        frame[0] = _PREAMBLE
-        frame[1] = _STARTCODE1
-        frame[2] = _STARTCODE2
-        checksum = sum(frame[0:3])
-        frame[3] = packet_length & 0xFF
-        frame[4] = (~packet_length + 1) & 0xFF
+        frame[0:3] = _FRAME_START
+        struct.pack_into('BB', frame, 3, packet_length & 0xFF, -packet_length & 0xFF)
         frame[5:-2] = packet_data
-        checksum += sum(packet_data)
-        frame[-2] = ~checksum & 0xFF
-        frame[-1] = _POSTAMBLE
+        checksum = _FRAME_START_CHECKSUM + sum(packet_data)
+        struct.pack_into('BB', frame, packet_length + 5, ~checksum & 0xFF, _POSTAMBLE)
         return frame
-   
+
     def _parse_frame(self, packet_data):
         """
         Handle the parsing of a frame.
@@ -183,12 +202,9 @@ class PN532:
         :param data: The data for parsing.
         :return: Constructed or parsed frame.
         """
-        offset = 0
-        while packet_data[offset] == 0x00:
-            offset += 1
-            if offset >= len(packet_data):
-                raise RuntimeError('Response frame preamble does not contain 0x00FF!')
-        if packet_data[offset] != 0xFF:
+        # The preamble is a run of 0x00 bytes ended by the 0xFF start code.
+        offset = packet_data.find(0xFF)
+        if offset < 0 or packet_data.count(0x00, 0, offset) != offset:
             raise RuntimeError('Response frame preamble does not contain 0x00FF!')
         offset += 1
         if offset >= len(packet_data):
@@ -198,7 +214,7 @@ class PN532:
         if (frame_len + packet_data[offset+1]) & 0xFF != 0:
             raise RuntimeError('Response length checksum did not match length!')
         
-        checksum = sum(packet_data[offset+2:offset+2+frame_len+1]) & 0xFF
+        checksum = sum(memoryview(packet_data)[offset+2:offset+2+frame_len+1]) & 0xFF
         if checksum != 0:
             raise RuntimeError('Response checksum did not match expected value.')
         
@@ -223,10 +239,7 @@ class PN532:
         """
         Wait for an ACK response within the given timeout.
         """
-        ack = self._read_data(len(_ACK))
-        if ack == _ACK:
-            return True
-        return False
+        return self._read_data(_ACK_LEN) == _ACK
 
     def SAM_configuration(self):
         """
@@ -252,6 +265,34 @@ class PN532:
                                            timeout=timeout)
         except BusyError:
             return None
+        return self._parse_passive_target(response)
+
+    def start_passive_target_detection(self, card_baud=_ISO14443A):
+        """
+        Send InListPassiveTarget without waiting for a card to show up.
+        The PN532 pulls its IRQ line low once a target has been found,
+        after which the UID can be fetched with read_passive_target.
+        """
+        try:
+            return self._send_command(_PN532_CMD_INLISTPASSIVETARGET,
+                                      params=[0x01, card_baud])
+        except BusyError:
+            return False
+
+    def read_passive_target(self, timeout=1):
+        """
+        Read the UID of the card found after start_passive_target_detection.
+        """
+        try:
+            response = self._read_response(19, timeout)
+        except BusyError:
+            return None
+        return self._parse_passive_target(response)
+
+    def _parse_passive_target(self, response):
+        """
+        Extract the UID from an InListPassiveTarget response.
+        """
         # If no response is available return None to indicate no card is present.
         if response is None:
             return None
@@ -260,5 +301,5 @@ class PN532:
             raise RuntimeError('More than one card detected!')
         if response[5] > 7:
             raise RuntimeError('Found card with unexpectedly long UID!')
-        # Return UID of card.
-        return response[6:6 + response[5]]
+        # Return UID of card as immutable bytes, usable directly as a dict/set key.
+        return bytes(response[6:6 + response[5]])
@@ -37,79 +37,82 @@ _SPI_STATREAD = 0x02
 _SPI_DATAWRITE = 0x01
 _SPI_DATAREAD = 0x03
 _SPI_READY = 0x01
+# The PN532 datasheet allows up to 5 MHz; lower it for long or noisy wiring.
+SPI_MAX_SPEED_HZ = 5000000
 
 
 class SPIDevice:
     """
     Implements SPI device on spidev
     """
-    def __init__(self, cs=None):
+    def __init__(self, cs=None, max_speed_hz=SPI_MAX_SPEED_HZ):
         self.spi = spidev.SpiDev(0, 0)
         GPIO.setmode(GPIO.BCM)
         self._cs = cs
         if cs:
             GPIO.setup(self._cs, GPIO.OUT)
             GPIO.output(self._cs, GPIO.HIGH)
-        self.spi.max_speed_hz = 1000000
+        self.spi.max_speed_hz = max_speed_hz
         self.spi.mode = 0b10    # CPOL=1 & CPHA=0
+        # writebytes2 (spidev >= 3.3) takes the buffer as is; older versions
+        # accept any sequence of ints, so bytes work there too.
+        self._writebytes = getattr(self.spi, 'writebytes2', self.spi.writebytes)
 
     def writebytes(self, buf):
         if self._cs:
             GPIO.output(self._cs, GPIO.LOW)
-            time.sleep(0.001);
-        ret = self.spi.writebytes(list(buf))
+        ret = self._writebytes(buf)
         if self._cs:
-            time.sleep(0.001);
             GPIO.output(self._cs, GPIO.HIGH)
         return ret
 
     def readbytes(self, count):
         if self._cs:
             GPIO.output(self._cs, GPIO.LOW)
-            time.sleep(0.001);
         ret = bytearray(self.spi.readbytes(count))
         if self._cs:
-            time.sleep(0.001);
             GPIO.output(self._cs, GPIO.HIGH)
         return ret
 
     def xfer(self, buf):
         if self._cs:
             GPIO.output(self._cs, GPIO.LOW)
-            time.sleep(0.001);
         buf = bytearray(self.spi.xfer(buf))
         if self._cs:
-            time.sleep(0.001);
             GPIO.output(self._cs, GPIO.HIGH)
         return buf
 
 
+# Bit-reversed value of every byte, so reversing is a lookup instead of a loop.
+_REVBITS = bytes(int(f'{i:08b}'[::-1], 2) for i in range(256))
+
+# spidev does not modify the buffer it sends, so the status poll is a constant.
+_SPI_STATUS_FRAME = bytes((_REVBITS[_SPI_STATREAD], 0x00))
+
+
 def reverse_bit(num):
     """
     Turn an LSB byte to an MSB byte, and vice versa. Used for SPI as
     it is LSB for the PN532, but 99% of SPI implementations are MSB only!
     """
-    result = 0
-    for _ in range(8):
-        result <<= 1
-        result += (num & 1)
-        num >>= 1
-    return result
+    return _REVBITS[num]
 
 
 class PN532_SPI(PN532):
     """
     Driver for the PN532 connected over SPI. Pass in a hardware SPI device
-    & chip select digitalInOut pin. Optional IRQ pin (not used), reset pin and
-    debugging output.
+    & chip select digitalInOut pin. Optional IRQ pin (used to wait for
+    responses) and reset pin; `debug` is ignored, see the 'pn532' logger.
     """
-    def __init__(self, cs=None, irq=None, reset=None, debug=False):
+    def __init__(self, cs=None, irq=None, reset=None, debug=False,
+                 max_speed_hz=SPI_MAX_SPEED_HZ):
         """
         Create an instance of the PN532 class using SPI
         """
-        self.debug = debug
         self._gpio_init(cs=cs, irq=irq, reset=reset)
-        self._spi = SPIDevice(cs)
+        self._spi = SPIDevice(cs, max_speed_hz)
+        # Data read commands by length, reused across transfers.
+        self._read_frames = {}
         super().__init__(debug=debug, reset=reset)
 
     def _gpio_init(self, reset=None, cs=None, irq=None):
@@ -140,48 +143,49 @@ class PN532_SPI(PN532):
         """
         Send any special commands/data to wake up PN532
         """
-        time.sleep(1)
         if self._cs:
             GPIO.output(self._cs, GPIO.LOW)
+        # Hold CS low for at least T_osc_start (2 ms) before clocking a byte.
         time.sleep(0.002)
         self._spi.writebytes(bytearray([0x00]))
-        time.sleep(1)
+        time.sleep(0.01)
 
     def _wait_ready(self, timeout=1):
         """
         Poll PN532 if status byte is ready, up to `timeout` seconds
         """
-        status = bytearray([reverse_bit(_SPI_STATREAD), 0])
+        if self._irq:
+            # The PN532 holds IRQ low while a frame is waiting, so block on
+            # the falling edge instead of clocking status reads over SPI.
+            if not GPIO.input(self._irq):
+                return True
+            # Re-check the level on timeout: IRQ may have fallen between the
+            # check above and arming the edge wait, and that edge is lost.
+            return (GPIO.wait_for_edge(self._irq, GPIO.FALLING,
+                                       timeout=max(1, int(timeout * 1000))) is not None
+                    or not GPIO.input(self._irq))
         timestamp = time.monotonic()
         while (time.monotonic() - timestamp) < timeout:
-            time.sleep(0.01)
-            status = self._spi.xfer(status)
+            status = self._spi.xfer(_SPI_STATUS_FRAME)
             if reverse_bit(status[1]) == _SPI_READY:
                 return True
-            else:
-                time.sleep(0.005)
+            time.sleep(0.001)
         return False
 
     def _read_data(self, count):
         """
         Read a specified count of bytes from the PN532.
         """
-        frame = bytearray(count+1)
-        frame[0] = reverse_bit(_SPI_DATAREAD)
-        time.sleep(0.005)
-        frame = self._spi.xfer(frame)
-        for i, val in enumerate(frame):
-            frame[i] = reverse_bit(val)
-        #if self.debug:
-        #    print("Reading: ", [hex(i) for i in frame[1:]])
+        frame = self._read_frames.get(count)
+        if frame is None:
+            frame = self._read_frames[count] = bytearray(count+1)
+            frame[0] = reverse_bit(_SPI_DATAREAD)
+        frame = self._spi.xfer(frame).translate(_REVBITS)
         return frame[1:]
 
     def _write_data(self, framebytes):
         """
         Write a specified count of bytes to the PN532
         """
-        rev_frame = [reverse_bit(x) for x in bytes([_SPI_DATAWRITE]) + framebytes]
-        #if self.debug:
-        #    print("Writing: ", [hex(i) for i in rev_frame])
-        time.sleep(0.02)
-        self._spi.writebytes(bytes(rev_frame))
+        rev_frame = (bytes([_SPI_DATAWRITE]) + framebytes).translate(_REVBITS)
+        self._spi.writebytes(rev_frame)
@@ -28,19 +28,28 @@
 This module will let you communicate with a PN532 RFID/NFC chip
 using UART (ttyS0) on the Raspberry Pi.
 """
+import logging
+import select
 import time
 import serial
 import RPi.GPIO as GPIO
 from .pn532 import PN532, BusyError
 
+logger = logging.getLogger(__name__)
+
 DEV_SERIAL = '/dev/ttyS0'
 BAUD_RATE = 115200
+# Upper bound on a frame read once the PN532 is ready, and the line-idle gap
+# that ends it early; responses are often shorter than the count asked for.
+READ_TIMEOUT = 0.1
+INTER_BYTE_TIMEOUT = 0.01
 
 
 class PN532_UART(PN532):
     """
     Driver for the PN532 connected over UART. Pass in a hardware UART device.
-    Optional IRQ pin (not used), reset pin and debugging output. 
+    Optional IRQ pin (used to wait for responses) and reset pin; `debug` is
+    ignored, see the 'pn532' logger.
     """
     def __init__(self, dev=DEV_SERIAL, baudrate=BAUD_RATE,
                 irq=None, reset=None, debug=False):
@@ -52,9 +61,9 @@ class PN532_UART(PN532):
         using 'sudo raspi-config' --> 'Interfacing Options' --> 'Serial'
         """
 
-        self.debug = debug
         self._gpio_init(irq=irq, reset=reset)
-        self._uart = serial.Serial(dev, baudrate)
+        self._uart = serial.Serial(dev, baudrate, timeout=READ_TIMEOUT,
+                                   inter_byte_timeout=INTER_BYTE_TIMEOUT)
         if not self._uart.is_open:
             raise RuntimeError('cannot open {0}'.format(dev))
         super().__init__(debug=debug, reset=reset)
@@ -90,30 +99,41 @@ class PN532_UART(PN532):
         """
         Wait for response frame, up to `timeout` seconds
         """
-        timestamp = time.monotonic()
-        while (time.monotonic() - timestamp) < timeout:
-            if self._uart.in_waiting:
+        if self._irq:
+            # IRQ goes low once the PN532 has a frame for us; block on the
+            # edge instead of sleeping between in_waiting checks. The frame
+            # may still be arriving, _read_data waits for the rest of it.
+            if self._uart.in_waiting or not GPIO.input(self._irq):
                 return True
-            else:
-                time.sleep(0.05)
-        return False
+            # Re-check the level on timeout: IRQ may have fallen between the
+            # check above and arming the edge wait, and that edge is lost.
+            return (GPIO.wait_for_edge(self._irq, GPIO.FALLING,
+                                       timeout=max(1, int(timeout * 1000))) is not None
+                    or not GPIO.input(self._irq))
+        if self._uart.in_waiting:
+            return True
+        # Let the kernel wake us when the port becomes readable rather than
+        # sleeping in fixed 50 ms steps.
+        readable, _, _ = select.select([self._uart], [], [], timeout)
+        return bool(readable)
 
     def _read_data(self, count):
         """
         Read a specified count of bytes from the PN532.
         """
-        frame = self._uart.read(min(self._uart.in_waiting, count))
+        # _wait_ready returns on the first byte of a frame, so block until
+        # `count` bytes are in or the line goes idle rather than taking
+        # whatever happens to be buffered.
+        frame = self._uart.read(count)
         if not frame:
             raise BusyError("No data read from PN532")
-        if self.debug:
-            print("Reading: ", [hex(i) for i in frame])
-        else:
-            time.sleep(0.005)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('Reading: %s', frame.hex(' '))
         return frame
 
     def _write_data(self, framebytes):
         """
         Write a specified count of bytes to the PN532
         """
-        self._uart.read(self._uart.in_waiting)
+        self._uart.reset_input_buffer()
         self._uart.write(framebytes)